@@ -15,7 +15,9 @@
 __author__ = "lizlooney@google.com (Liz Looney)"
 
 # Python Standard Library
+import collections
 from enum import Enum
+import functools
 import importlib
 import inspect
 import logging
@@ -25,15 +27,29 @@ import types
 import typing
 
 
+_CLASS_REPR_RE = re.compile(r"\<class \'(.+)\'>")
+
+_SIGNATURE_RE = re.compile(r"(\w+)\((.*)\) \-\> (.+)")
+
+_OVERLOAD_RE = re.compile(r"\n\n(\d+)\. ")
+
+_GETTER_RE = re.compile(r"(\w*)\((\w+)\: (.+)\) \-\> (.+)")
+
+# Signature types that getClassesFromSignatureLine does not look up.
+_PRIMITIVE_ARG_TYPES = frozenset({"bool", "str", "float", "int"})
+_PRIMITIVE_RETURN_TYPES = _PRIMITIVE_ARG_TYPES | {"None"}
+
 
 def getModule(module_name: str) -> types.ModuleType:
   return importlib.import_module(module_name)
 
 
+@functools.cache
 def getFullModuleName(module: types.ModuleType) -> str:
   return module.__name__
 
 
+@functools.cache
 def getClass(full_class_name: str) -> type:
   parts = full_class_name.split(".")
   for i in range(len(parts)):
@@ -46,16 +62,44 @@ def getClass(full_class_name: str) -> type:
   return object
 
 
+@functools.cache
 def getFullClassName(cls: type) -> str:
-  match = re.fullmatch(r"\<class \'(.+)\'>", str(cls))
+  match = _CLASS_REPR_RE.fullmatch(str(cls))
   if match:
     return match.group(1)
   # The following doesn't work for nested classes.
   return f"{cls.__module__}.{cls.__name__}"
 
 
+# Like functools.cache for a function of one object, but keyed on id(object) so that it also works
+# for objects that aren't hashable. The object is kept in the cache so that its id isn't reused.
+def _cacheById(function):
+  dict_id_to_object_and_result = {}
+
+  @functools.wraps(function)
+  def wrapper(object):
+    object_and_result = dict_id_to_object_and_result.get(id(object))
+    if object_and_result is None:
+      object_and_result = (object, function(object))
+      dict_id_to_object_and_result[id(object)] = object_and_result
+    return object_and_result[1]
+
+  return wrapper
+
+
+_getAllMembers = _cacheById(inspect.getmembers)
+
+
+# Returns the same list as inspect.getmembers, but only looks up the members of each object once.
+def getMembers(object, predicate=None) -> list[tuple[str, typing.Any]]:
+  members = _getAllMembers(object)
+  if predicate is None:
+    return list(members)
+  return [(key, value) for (key, value) in members if predicate(value)]
+
+
 def _isSignature(line: str) -> bool:
-  match = re.fullmatch(r"(\w+)\((.*)\) \-\> (.+)", line)
+  match = _SIGNATURE_RE.fullmatch(line)
   return True if match else False
 
 
@@ -80,7 +124,13 @@ def _findEndOfToken(text: str, i: int, delimiters: list[str]):
 
 
 def processSignature(signature_line: str) -> tuple[str, list[str], list[str], list[str], str]:
-  match = re.fullmatch(r"(\w+)\((.*)\) \-\> (.+)", signature_line)
+  (function_name, arg_names, arg_types, arg_default_values, return_type) = _parseSignature(signature_line)
+  return (function_name, list(arg_names), list(arg_types), list(arg_default_values), return_type)
+
+
+@functools.cache
+def _parseSignature(signature_line: str) -> tuple[str, tuple[str], tuple[str], tuple[str], str]:
+  match = _SIGNATURE_RE.fullmatch(signature_line)
   if not match:
     raise Exception(f"Failed to parse signature line {signature_line}")
   function_name = match.group(1)
@@ -135,7 +185,7 @@ def processSignature(signature_line: str) -> tuple[str, list[str], list[str], li
       arg_default_values.append(None)
     if i + 1 < len(args) and args[i:i + 2] == ", ":
       i += 2 # Skip over ", "
-  return (function_name, arg_names, arg_types, arg_default_values, return_type)
+  return (function_name, tuple(arg_names), tuple(arg_types), tuple(arg_default_values), return_type)
 
 
 def ignoreMember(parent, key: str, member):
@@ -180,6 +230,7 @@ def startsWithkUpper(s: str):
       len(s) > 1 and s[1].isupper())
 
 
+@_cacheById
 def isEnum(object):
   if not inspect.isclass(object):
     return False
@@ -200,6 +251,7 @@ def isEnum(object):
       inspect.isdatadescriptor(object.value))
 
 
+@_cacheById
 def mightBeConstructor(object):
   return (
       inspect.isroutine(object) and
@@ -220,7 +272,43 @@ def isFunction(parent, key: str, object):
     not key.startswith("_"))
 
 
+# Types whose instances are always rejected by one of the inspect predicates in isNothing.
+_NOTHING_REJECTED_TYPES = frozenset({
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    types.GeneratorType,
+    types.CoroutineType,
+    types.AsyncGeneratorType,
+    types.TracebackType,
+    types.FrameType,
+    types.CodeType,
+    types.MethodWrapperType,
+    types.MethodDescriptorType,
+    types.WrapperDescriptorType,
+    types.ClassMethodDescriptorType,
+    types.GetSetDescriptorType,
+    types.MemberDescriptorType,
+    property,
+    staticmethod,
+    classmethod,
+})
+
+# Types whose instances are never matched by any of the inspect predicates in isNothing.
+_NOTHING_ACCEPTED_TYPES = frozenset({
+    bool, int, float, complex, str, bytes, type(None), tuple, list, dict, set, frozenset,
+})
+
+
+@_cacheById
 def isNothing(object):
+  object_type = type(object)
+  if object_type in _NOTHING_REJECTED_TYPES:
+    return False
+  if object_type in _NOTHING_ACCEPTED_TYPES:
+    return True
   return (
       not inspect.ismodule(object) and
       not inspect.isclass(object) and
@@ -246,13 +334,13 @@ def isNothing(object):
 
 
 def isModuleVariableReadable(parent, key: str, object):
+  object_type = type(object)
   return (
       inspect.ismodule(parent) and
       not (key.startswith("_") and not startsWithUnderscoreDigit(key)) and
       isNothing(object) and
-      not (type(object) == logging.Logger) and
-      not (type(object).__module__ == "typing") and
-      not (type(object).__module__ == "__future__"))
+      not (object_type == logging.Logger) and
+      object_type.__module__ not in ("typing", "__future__"))
 
 
 def isModuleVariableWritable(parent, key: str, object):
@@ -263,13 +351,14 @@ def isModuleVariableWritable(parent, key: str, object):
 
 
 def isClassVariableReadable(parent, key: str, object):
+  object_type = type(object)
   return (
     inspect.isclass(parent) and
     not (key.startswith("_") and not startsWithUnderscoreDigit(key)) and
     isNothing(object) and
-    not (isEnum(parent) and type(object) == parent) and
-    not (type(object) == logging.Logger) and
-    not (key == "WPIStruct" and type(object).__name__ == "PyCapsule"))
+    not (isEnum(parent) and object_type == parent) and
+    not (object_type == logging.Logger) and
+    not (key == "WPIStruct" and object_type.__name__ == "PyCapsule"))
 
 
 def isClassVariableWritable(parent, key: str, object):
@@ -304,6 +393,7 @@ def isTypeAlias(parent, key: str, object):
     (inspect.ismodule(parent) or inspect.isclass(parent)))
 
 
+@_cacheById
 def isOverloaded(object):
   return (
     inspect.isroutine(object) and
@@ -319,8 +409,7 @@ def _annotationToType(annotation) -> str:
 def inspectSignature(object, cls=None) -> str:
   try:
     sig = inspect.signature(object)
-    s = f"{object.__name__}("
-    delimiter = ""
+    params = []
     for param in sig.parameters.values():
       param_name_prefix = ""
       param_type = ""
@@ -334,11 +423,10 @@ def inspectSignature(object, cls=None) -> str:
         elif param.name == "kwargs":
           param_name_prefix = "**"
       if param_type:
-        s = f"{s}{delimiter}{param_name_prefix}{param.name}: {param_type}"
+        params.append(f"{param_name_prefix}{param.name}: {param_type}")
       else:
-        s = f"{s}{delimiter}{param_name_prefix}{param.name}"
-      delimiter = ", "
-    s = f"{s})"
+        params.append(f"{param_name_prefix}{param.name}")
+    s = f"{object.__name__}({', '.join(params)})"
 
     if sig.return_annotation != inspect.Signature.empty:
       s = f"{s} -> {_annotationToType(sig.return_annotation)}"
@@ -377,50 +465,60 @@ def processFunction(object, cls=None) -> tuple[list[str], list[str]]:
         comments.append(doc)
     return (signatures, comments)
 
+  (signatures, comments) = _processOverloadedFunctionDoc(doc)
+  return (list(signatures), list(comments))
+
+
+@functools.cache
+def _processOverloadedFunctionDoc(doc: str) -> tuple[tuple[str], tuple[str]]:
+  signatures = []
+  comments = []
   signatureIndices = []
   commentEndIndices = []
 
-  # Find the indices of the start of signatures
-  expected_number = 1
-  index = 0
-  while True:
-    s = f"\n\n{expected_number}. "
-    index = doc.find(s, index)
-    if index == -1:
-      commentEndIndices.append(len(doc))
-      break
-    if expected_number > 1:
-      commentEndIndices.append(index)
-    index += len(s)
-    signatureIndices.append(index)
-    expected_number += 1
+  # Find the indices of the start of signatures. The numbers must be
+  # consecutive, starting at 1; any other numbered paragraph is skipped.
+  expected_number = "1"
+  for match in _OVERLOAD_RE.finditer(doc):
+    if match.group(1) != expected_number:
+      continue
+    if signatureIndices:
+      commentEndIndices.append(match.start())
+    signatureIndices.append(match.end())
+    expected_number = str(len(signatureIndices) + 1)
+  commentEndIndices.append(len(doc))
 
   for i in range(len(signatureIndices)):
     index = signatureIndices[i]
     eolIndex = doc.find("\n", index)
     signatures.append(doc[index:eolIndex])
     comments.append(doc[eolIndex + 1 : commentEndIndices[i]].strip())
-  return (signatures, comments)
+  return (tuple(signatures), tuple(comments))
 
 
 def getClassesFromSignatureLine(signature_line: str):
+  return list(_getClassesFromSignatureLine(signature_line))
+
+
+@functools.cache
+def _getClassesFromSignatureLine(signature_line: str) -> tuple[type]:
   classes = []
   try:
     (function_name, arg_names, arg_types, arg_default_values, return_type) = processSignature(signature_line)
     for arg_type in arg_types:
-      if arg_type == "bool" or arg_type == "str" or arg_type == "float" or arg_type == "int":
+      if arg_type in _PRIMITIVE_ARG_TYPES:
         continue
       classes.append(getClass(arg_type))
-    if return_type != "None" and return_type != "bool" and return_type != "str" and return_type != "float" and return_type != "int":
+    if return_type not in _PRIMITIVE_RETURN_TYPES:
       classes.append(getClass(return_type))
   except:
     pass
-  return classes
+  return tuple(classes)
 
 
 def _processGetter(fget: types.FunctionType) -> tuple[str, str, str, str]:
-  signature_line = fget.__doc__.split("\n")[0]
-  match = re.fullmatch(r"(\w*)\((\w+)\: (.+)\) \-\> (.+)", signature_line)
+  signature_line = fget.__doc__.partition("\n")[0]
+  match = _GETTER_RE.fullmatch(signature_line)
   if not match:
     raise Exception(f"Failed to parse signature line {signature_line}")
   var_name = match.group(1)
@@ -430,6 +528,9 @@ def _processGetter(fget: types.FunctionType) -> tuple[str, str, str, str]:
   return (var_name, self_name, self_type, var_type)
 
 
+# The same getters are reached through every class that inherits the property. Getters aren't
+# necessarily hashable, so they are cached by id.
+@_cacheById
 def getVarTypeFromGetter(fget: types.FunctionType) -> str:
   try:
     (var_name, self_name, self_type, var_type) = _processGetter(fget)
@@ -438,6 +539,7 @@ def getVarTypeFromGetter(fget: types.FunctionType) -> str:
     return None
 
 
+@functools.cache
 def _isBuiltInModuleName(first_module_name: str):
   if first_module_name in sys.stdlib_module_names:
     return True
@@ -446,36 +548,48 @@ def _isBuiltInModuleName(first_module_name: str):
   return False
 
 
+@functools.cache
 def isBuiltInModule(module: types.ModuleType):
-  return _isBuiltInModuleName(getFullModuleName(module).split(".")[0])
+  return _isBuiltInModuleName(getFullModuleName(module).partition(".")[0])
 
 
+@functools.cache
 def isBuiltInClass(cls: type):
-  return _isBuiltInModuleName(cls.__module__.split(".")[0])
+  return _isBuiltInModuleName(cls.__module__.partition(".")[0])
+
+
+@functools.cache
+def getNonBuiltInMro(cls: type) -> tuple[type]:
+  # The classes in the method resolution order of cls (including cls), up to the first built-in class.
+  mro = []
+  for c in inspect.getmro(cls):
+    if isBuiltInClass(c):
+      break
+    mro.append(c)
+  return tuple(mro)
 
 
 def _collectModulesAndClasses(
     object, packages: list[str], modules: list[types.ModuleType], classes: list[type],
-    dict_class_name_to_alias: dict[str, str], ids: list[int]):
+    dict_class_name_to_alias: dict[str, str], ids: set[int]):
+  # Each object gets past this check only once, so it is appended to modules or classes at most once.
   if id(object) in ids:
     return
-  ids.append(id(object))
+  ids.add(id(object))
 
   if inspect.ismodule(object):
     if isBuiltInModule(object):
       return
-    if object not in modules:
-      modules.append(object)
+    modules.append(object)
     if object.__package__:
       if object.__package__ not in packages:
         packages.append(object.__package__)
   if inspect.isclass(object):
     if isBuiltInClass(object):
       return
-    if object not in classes:
-      classes.append(object)
+    classes.append(object)
 
-  for key, member in inspect.getmembers(object):
+  for key, member in getMembers(object):
     if key == "_":
       continue
     if ignoreMember(object, key, member):
@@ -492,9 +606,7 @@ def _collectModulesAndClasses(
       _collectModulesAndClasses(member, packages, modules, classes, dict_class_name_to_alias, ids)
     if inspect.isclass(member):
       # Collect the classes in the base classes (including this class).
-      for cls in inspect.getmro(member):
-        if isBuiltInClass(cls):
-          break
+      for cls in getNonBuiltInMro(member):
         _collectModulesAndClasses(cls, packages, modules, classes, dict_class_name_to_alias, ids)
     if inspect.isroutine(member) and member.__doc__:
       # Collect the classes for the function arguments and return types.
@@ -526,25 +638,21 @@ def collectModulesAndClasses(root_modules: list[types.ModuleType]) -> tuple[list
   modules = []
   classes = []
   dict_class_name_to_alias = {}
-  ids = []
+  ids = set()
   for module in root_modules:
     _collectModulesAndClasses(module, packages, modules, classes, dict_class_name_to_alias, ids)
-  classes.sort(key=lambda c: getFullClassName(c))
+  classes.sort(key=getFullClassName)
   return (packages, modules, classes, dict_class_name_to_alias)
 
 
 def collectSubclasses(classes: list[type]) -> dict[str, list[str]]:
-  dict_class_name_to_subclass_names = {}
+  dict_class_name_to_subclass_names = collections.defaultdict(list)
   for subclass in classes:
     for base_class in subclass.__bases__:
       if isBuiltInClass(base_class):
         continue
-      base_class_name = getFullClassName(base_class)
-      subclass_names = dict_class_name_to_subclass_names.get(base_class_name)
-      if not subclass_names:
-        subclass_names = []
-        dict_class_name_to_subclass_names.update({base_class_name: subclass_names})
+      subclass_names = dict_class_name_to_subclass_names[getFullClassName(base_class)]
       subclass_name = getFullClassName(subclass)
       if subclass_name not in subclass_names:
         subclass_names.append(subclass_name)
-  return dict_class_name_to_subclass_names
+  return dict(dict_class_name_to_subclass_names)
@@ -16,6 +16,7 @@ __author__ = "lizlooney@google.com (Liz Looney)"
 
 # Python Standard Library
 import inspect
+import io
 import pathlib
 import re
 import sys
@@ -24,47 +25,9 @@ import types
 # absl
 from absl import app
 from absl import flags
-from absl import logging
-
-# robotpy
-import hal
-import hal.simulation
-import ntcore
-import pyfrc
-import wpilib
-import wpilib.counter
-import wpilib.drive
-import wpilib.event
-import wpilib.interfaces
-import wpilib.shuffleboard
-import wpilib.simulation
-import wpimath
-import wpimath.controller
-import wpimath.estimator
-import wpimath.filter
-import wpimath.geometry
-import wpimath.interpolation
-import wpimath.kinematics
-import wpimath.optimization
-import wpimath.path
-import wpimath.spline
-import wpimath.system
-import wpimath.system.plant
-import wpimath.trajectory
-import wpimath.trajectory.constraint
-import wpimath.units
-import wpinet
-import wpiutil
 
 # External samples
 sys.path.append("../external_samples")
-import color_range_sensor
-import component
-import rev_touch_sensor
-import servo
-import smart_motor
-import spark_mini
-import sparkfun_led_stick
 
 # Common modules
 sys.path.append("../common")
@@ -74,6 +37,95 @@ import python_util
 FLAGS = flags.FLAGS
 
 flags.DEFINE_string('output_directory', None, 'The directory where output should be written.')
+flags.mark_flag_as_required('output_directory')
+
+# The modules are imported in main, after the flags have been checked.
+_ROBOTPY_MODULE_NAMES = [
+  "hal",
+  "hal.simulation",
+  "ntcore",
+  "wpilib",
+  "wpilib.counter",
+  "wpilib.drive",
+  "wpilib.event",
+  "wpilib.interfaces",
+  "wpilib.shuffleboard",
+  "wpilib.simulation",
+  "wpimath",
+  "wpimath.controller",
+  "wpimath.estimator",
+  "wpimath.filter",
+  "wpimath.geometry",
+  "wpimath.interpolation",
+  "wpimath.kinematics",
+  "wpimath.optimization",
+  "wpimath.path",
+  "wpimath.spline",
+  "wpimath.system",
+  "wpimath.system.plant",
+  "wpimath.trajectory",
+  "wpimath.trajectory.constraint",
+  "wpimath.units",
+  "wpinet",
+  "wpiutil",
+]
+
+_EXTERNAL_SAMPLES_MODULE_NAMES = [
+  "color_range_sensor",
+  "component",
+  "rev_touch_sensor",
+  "servo",
+  "smart_motor",
+  "spark_mini",
+  "sparkfun_led_stick",
+]
+
+_MISSING = object()
+
+_OBJ_AT_RE = re.compile(r"object at 0x[0-9a-fA-F]{9}")
+
+# The inspect predicate details for types where every instance gives the same answers.
+# Types that aren't here (functions, classes, etc.) go through the inspect predicates.
+_KIND_TAGS = {
+  types.ModuleType: (),
+  types.BuiltinFunctionType: ("isbuiltin", "isroutine"),
+  types.MethodWrapperType: ("ismethodwrapper", "isroutine"),
+  types.MethodDescriptorType: ("isroutine", "ismethoddescriptor"),
+  types.WrapperDescriptorType: ("isroutine", "ismethoddescriptor"),
+  types.GetSetDescriptorType: ("isdatadescriptor", "isgetsetdescriptor"),
+  types.MemberDescriptorType: ("isdatadescriptor", "ismemberdescriptor"),
+  property: ("isdatadescriptor",),
+  type(None): (),
+  bool: (),
+  int: (),
+  float: (),
+  str: (),
+  list: (),
+  dict: (),
+  tuple: (),
+}
+
+# The isinstance details for the primitive types. Types that aren't here (including subclasses of
+# the primitive types) go through the isinstance checks.
+_PRIMITIVE_TAGS = {
+  bool: ("bool",),
+  int: ("int",),
+  float: ("float",),
+  str: ("str",),
+  list: ("list",),
+  dict: ("dict",),
+  tuple: ("tuple",),
+  type(None): (),
+  types.ModuleType: (),
+  types.FunctionType: (),
+  types.BuiltinFunctionType: (),
+  types.MethodWrapperType: (),
+  types.MethodDescriptorType: (),
+  types.WrapperDescriptorType: (),
+  types.GetSetDescriptorType: (),
+  types.MemberDescriptorType: (),
+  property: (),
+}
 
 
 class Examine:
@@ -82,11 +134,17 @@ class Examine:
     self._root_modules = root_modules
     (self._packages, self._modules, self._classes, self._dict_class_name_to_alias) = python_util.collectModulesAndClasses(self._root_modules)
     self._dict_class_name_to_subclass_names = python_util.collectSubclasses(self._classes)
-    self.output_file = open(f"{FLAGS.output_directory}/examine/{filename}", "w", encoding="utf-8")
+    self._sorted_package_names = sorted(self._packages)
+    self._sorted_module_names = sorted([python_util.getFullModuleName(module) for module in self._modules])
+    self._sorted_class_names = sorted([python_util.getFullClassName(cls) for cls in self._classes])
+    self._file_path = f"{FLAGS.output_directory}/examine/{filename}"
+    self.output_file = io.StringIO()
     self.show_ids = False
 
 
   def close(self):
+    with open(self._file_path, "w", encoding="utf-8") as f:
+      f.write(self.output_file.getvalue())
     self.output_file.close()
 
 
@@ -115,8 +173,25 @@ class Examine:
   def _examine(self,
       indent: str, full_name: str,
       parent, key: str, some_object,
-      ids: list[int], classes_from_function_signatures: list[type]) -> None:
+      ids: set[int], classes_from_function_signatures: list[type],
+      ids_of_classes_from_function_signatures: set[int]) -> None:
     details = []
+    is_module = isinstance(some_object, types.ModuleType)
+    is_class = isinstance(some_object, type)
+    is_routine = inspect.isroutine(some_object)
+    if (is_module or is_class) and id(some_object) in ids:
+      # This module or class has already been examined. Don't build its details again, but show what
+      # it is.
+      if is_module:
+        seen = f"<seen module {python_util.getFullModuleName(some_object)}>"
+      else:
+        seen = f"<seen class {python_util.getFullClassName(some_object)}>"
+      if self.show_ids:
+        print(f"{indent}> {full_name}: {id(some_object)} {seen}", file=self.output_file)
+      else:
+        print(f"{indent}> {full_name}: {seen}", file=self.output_file)
+      return
+
     if python_util.isEnum(some_object):
       details.append("blockEnum")
     if self._isModuleFunction(parent, key, some_object):
@@ -145,88 +220,101 @@ class Examine:
     if python_util.isOverloaded(some_object):
       details.append("isOverloaded")
 
-    if inspect.ismodule(some_object):
+    if is_module:
       full_name = python_util.getFullModuleName(some_object)
       details.append("ismodule")
-    if inspect.isclass(some_object):
+    if is_class:
       details.append("isclass")
       if not python_util.isTypeAlias(parent, key, some_object):
         full_name = python_util.getFullClassName(some_object)
-    if hasattr(some_object, '__package__'):
-      details.append(f"__package__='{some_object.__package__}'")
+    package = getattr(some_object, "__package__", _MISSING)
+    if package is not _MISSING:
+      details.append(f"__package__='{package}'")
     #if hasattr(some_object, '__all__'):
     #  details.append("__all__")
-    if inspect.isfunction(some_object):
-      details.append("isfunction")
-    if inspect.isgeneratorfunction(some_object):
-      details.append("isgeneratorfunction")
-    if inspect.isgenerator(some_object):
-      details.append("isgenerator")
-    if inspect.iscoroutinefunction(some_object):
-      details.append("iscoroutinefunction")
-    if inspect.iscoroutine(some_object):
-      details.append("iscoroutine")
-    if inspect.isawaitable(some_object):
-      details.append("isawaitable")
-    if inspect.isasyncgenfunction(some_object):
-      details.append("isasyncgenfunction")
-    if inspect.isasyncgen(some_object):
-      details.append("isasyncgen")
-    if inspect.istraceback(some_object):
-      details.append("istraceback")
-    if inspect.isframe(some_object):
-      details.append("isframe")
-    if inspect.iscode(some_object):
-      details.append("iscode")
-    if inspect.isbuiltin(some_object):
-      details.append("isbuiltin")
-    if inspect.ismethodwrapper(some_object):
-      details.append("ismethodwrapper")
-    if inspect.isroutine(some_object):
-      details.append("isroutine")
-    if inspect.isabstract(some_object):
-      details.append("isabstract")
-    if inspect.ismethoddescriptor(some_object):
-      details.append("ismethoddescriptor")
-    if inspect.isdatadescriptor(some_object):
-      details.append("isdatadescriptor")
-    if inspect.isgetsetdescriptor(some_object):
-      details.append("isgetsetdescriptor")
-    if inspect.ismemberdescriptor(some_object):
-      details.append("ismemberdescriptor")
-
-    if isinstance(some_object, bool):
-      details.append("bool")
-    elif isinstance(some_object, int):
-      details.append("int")
-    if isinstance(some_object, float):
-      details.append("float")
-    if isinstance(some_object, str):
-      details.append("str")
-    if isinstance(some_object, list):
-      details.append("list")
-    if isinstance(some_object, dict):
-      details.append("dict")
-    if isinstance(some_object, tuple):
-      details.append("tuple")
-
-    if inspect.ismodule(some_object):
+    kind_tags = _KIND_TAGS.get(type(some_object))
+    if kind_tags is not None:
+      details.extend(kind_tags)
+    else:
+      if isinstance(some_object, types.FunctionType):
+        details.append("isfunction")
+      if inspect.isgeneratorfunction(some_object):
+        details.append("isgeneratorfunction")
+      if inspect.isgenerator(some_object):
+        details.append("isgenerator")
+      if inspect.iscoroutinefunction(some_object):
+        details.append("iscoroutinefunction")
+      if inspect.iscoroutine(some_object):
+        details.append("iscoroutine")
+      if inspect.isawaitable(some_object):
+        details.append("isawaitable")
+      if inspect.isasyncgenfunction(some_object):
+        details.append("isasyncgenfunction")
+      if inspect.isasyncgen(some_object):
+        details.append("isasyncgen")
+      if inspect.istraceback(some_object):
+        details.append("istraceback")
+      if inspect.isframe(some_object):
+        details.append("isframe")
+      if inspect.iscode(some_object):
+        details.append("iscode")
+      if isinstance(some_object, types.BuiltinFunctionType):
+        details.append("isbuiltin")
+      if inspect.ismethodwrapper(some_object):
+        details.append("ismethodwrapper")
+      if is_routine:
+        details.append("isroutine")
+      if inspect.isabstract(some_object):
+        details.append("isabstract")
+      if inspect.ismethoddescriptor(some_object):
+        details.append("ismethoddescriptor")
+      if inspect.isdatadescriptor(some_object):
+        details.append("isdatadescriptor")
+      if inspect.isgetsetdescriptor(some_object):
+        details.append("isgetsetdescriptor")
+      if inspect.ismemberdescriptor(some_object):
+        details.append("ismemberdescriptor")
+
+    primitive_tags = _PRIMITIVE_TAGS.get(type(some_object))
+    if primitive_tags is not None:
+      details.extend(primitive_tags)
+    else:
+      if isinstance(some_object, bool):
+        details.append("bool")
+      elif isinstance(some_object, int):
+        details.append("int")
+      if isinstance(some_object, float):
+        details.append("float")
+      if isinstance(some_object, str):
+        details.append("str")
+      if isinstance(some_object, list):
+        details.append("list")
+      if isinstance(some_object, dict):
+        details.append("dict")
+      if isinstance(some_object, tuple):
+        details.append("tuple")
+
+    if is_module:
       details.append(f"{python_util.getFullModuleName(some_object)} {some_object}")
-    elif inspect.isclass(some_object):
+    elif is_class:
       details.append(f"{python_util.getFullClassName(some_object)}")
     else:
       details.append(f"type={type(some_object)}")
-    if hasattr(some_object, "__name__") and some_object.__name__ and not inspect.ismodule(some_object) and not inspect.isclass(some_object):
-      details.append(f"__name__='{some_object.__name__}'")
-    if hasattr(some_object, "__module__") and some_object.__module__ and not inspect.isclass(some_object):
-      details.append(f"__module__='{some_object.__module__}'")
+    name = getattr(some_object, "__name__", None)
+    if name and not is_module and not is_class:
+      details.append(f"__name__='{name}'")
+    module_name = getattr(some_object, "__module__", None)
+    if module_name and not is_class:
+      details.append(f"__module__='{module_name}'")
 
     if some_object.__doc__:
-      doc = re.sub(r"object at 0x[0-9a-fA-F]{9}", "object at 0x123456789", some_object.__doc__)
-      joined = "\\n".join(doc.split("\n"))
+      doc = some_object.__doc__
+      if "object at 0x" in doc:
+        doc = _OBJ_AT_RE.sub("object at 0x123456789", doc)
+      joined = doc.replace("\n", "\\n")
       details.append(f"__doc__='{joined}'")
 
-    if inspect.isfunction(some_object):
+    if isinstance(some_object, types.FunctionType):
       if inspect.isclass(parent):
         s = python_util.inspectSignature(some_object, parent)
       else:
@@ -241,51 +329,59 @@ class Examine:
 
     if id(some_object) in ids:
       return
-    ids.append(id(some_object))
+    ids.add(id(some_object))
 
-    if inspect.isroutine(some_object) and some_object.__doc__:
+    if is_routine and some_object.__doc__:
       signature_line = some_object.__doc__.split("\n")[0]
       for cls in python_util.getClassesFromSignatureLine(signature_line):
         if python_util.isBuiltInClass(cls):
           continue
-        if cls not in classes_from_function_signatures:
+        if id(cls) not in ids_of_classes_from_function_signatures:
+          ids_of_classes_from_function_signatures.add(id(cls))
           classes_from_function_signatures.append(cls)
 
-    if inspect.ismodule(some_object) and python_util.isBuiltInModule(some_object):
+    if is_module and python_util.isBuiltInModule(some_object):
       return
-    if inspect.isclass(some_object) and python_util.isBuiltInClass(some_object):
+    if is_class and python_util.isBuiltInClass(some_object):
       return
     if python_util.isEnum(parent):
       return
 
     force_show_everything = False
 
-    if inspect.ismodule(some_object) or inspect.isclass(some_object) or inspect.isdatadescriptor(some_object):
+    is_data_descriptor = inspect.isdatadescriptor(some_object)
+    if is_module or is_class or is_data_descriptor:
       indent += "  "
-      for key in sorted(dir(some_object)):
-        if key == "_":
-          if not force_show_everything:
-            continue
-        if inspect.isdatadescriptor(some_object):
-          if key != "fget" and key != "fset":
-            continue
-        member = getattr(some_object, key)
+      if is_module:
+        # A module's members are all in its __dict__, so read them from there instead of through getattr.
+        module_dict = vars(some_object)
+        keys = sorted(module_dict)
+      else:
+        keys = sorted(dir(some_object))
+      if is_data_descriptor:
+        keys = [key for key in keys if key == "fget" or key == "fset"]
+      elif not force_show_everything:
+        keys = [key for key in keys if key != "_"]
+      name_prefix = full_name + "."
+      for key in keys:
+        member = module_dict[key] if is_module else getattr(some_object, key)
         if python_util.ignoreMember(some_object, key, member):
             continue
         self._examine(
-            indent, f"{full_name}.{key}",
+            indent, name_prefix + key,
             some_object, key, member,
-            ids, classes_from_function_signatures)
+            ids, classes_from_function_signatures, ids_of_classes_from_function_signatures)
 
 
   def examine(self) -> None:
-    ids = []
+    ids = set()
     classes_from_function_signatures = []
+    ids_of_classes_from_function_signatures = set()
     for module in self._root_modules:
       self._examine(
           "", python_util.getFullModuleName(module),
           None, python_util.getFullModuleName(module), module,
-          ids, classes_from_function_signatures)
+          ids, classes_from_function_signatures, ids_of_classes_from_function_signatures)
     while len(classes_from_function_signatures):
       classes = classes_from_function_signatures
       classes.sort(key=lambda c: python_util.getFullClassName(c))
@@ -295,7 +391,7 @@ class Examine:
           self._examine(
               "", "",
               None, "", cls,
-              ids, classes_from_function_signatures)
+              ids, classes_from_function_signatures, ids_of_classes_from_function_signatures)
           break_out = False
       if break_out:
         break
@@ -303,11 +399,11 @@ class Examine:
 
   def showPackagesAndModulesAndClasses(self) -> None:
     print("\n\nPackages:", file=self.output_file)
-    print("\n".join(sorted(self._packages)), file=self.output_file)
+    print("\n".join(self._sorted_package_names), file=self.output_file)
     print("\n\nModules:", file=self.output_file)
-    print("\n".join(sorted([python_util.getFullModuleName(module) for module in self._modules])), file=self.output_file)
+    print("\n".join(self._sorted_module_names), file=self.output_file)
     print("\n\nClasses:", file=self.output_file)
-    print("\n".join(sorted([python_util.getFullClassName(cls) for cls in self._classes])), file=self.output_file)
+    print("\n".join(self._sorted_class_names), file=self.output_file)
     print("\n\nType Aliases:", file=self.output_file)
     print("\n".join(sorted([f"{key}: {value}" for (key, value) in self._dict_class_name_to_alias.items()])), file=self.output_file)
     print("\n\nSubclasses:", file=self.output_file)
@@ -317,55 +413,15 @@ class Examine:
 def main(argv):
   del argv  # Unused.
 
-  if not FLAGS.output_directory:
-    logging.error("You must specify the --output_directory argument")
-    return
-
   pathlib.Path(f"{FLAGS.output_directory}/examine").mkdir(exist_ok=True)
 
-  robotpy_modules = [
-    hal,
-    hal.simulation,
-    ntcore,
-    wpilib,
-    wpilib.counter,
-    wpilib.drive,
-    wpilib.event,
-    wpilib.interfaces,
-    wpilib.shuffleboard,
-    wpilib.simulation,
-    wpimath,
-    wpimath.controller,
-    wpimath.estimator,
-    wpimath.filter,
-    wpimath.geometry,
-    wpimath.interpolation,
-    wpimath.kinematics,
-    wpimath.optimization,
-    wpimath.path,
-    wpimath.spline,
-    wpimath.system,
-    wpimath.system.plant,
-    wpimath.trajectory,
-    wpimath.trajectory.constraint,
-    wpimath.units,
-    wpinet,
-    wpiutil,
-  ]
+  robotpy_modules = [python_util.getModule(module_name) for module_name in _ROBOTPY_MODULE_NAMES]
   examine = Examine(robotpy_modules, "robotpy.txt")
   examine.examine()
   examine.showPackagesAndModulesAndClasses()
   examine.close()
 
-  external_samples_modules = [
-    color_range_sensor,
-    component,
-    rev_touch_sensor,
-    servo,
-    smart_motor,
-    spark_mini,
-    sparkfun_led_stick,
-  ]
+  external_samples_modules = [python_util.getModule(module_name) for module_name in _EXTERNAL_SAMPLES_MODULE_NAMES]
   examine = Examine(external_samples_modules, "external_samples.txt")
   examine.examine()
   examine.showPackagesAndModulesAndClasses()
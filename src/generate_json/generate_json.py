@@ -15,53 +15,21 @@
 __author__ = "lizlooney@google.com (Liz Looney)"
 
 # Python Standard Library
+import concurrent.futures
+import hashlib
+import importlib.metadata
+import os
 import pathlib
 import sys
+import types
 
 # absl
 from absl import app
 from absl import flags
 from absl import logging
 
-# robotpy
-import hal
-import hal.simulation
-import ntcore
-import pyfrc
-import wpilib
-import wpilib.counter
-import wpilib.drive
-import wpilib.event
-import wpilib.interfaces
-import wpilib.shuffleboard
-import wpilib.simulation
-import wpimath
-import wpimath.controller
-import wpimath.estimator
-import wpimath.filter
-import wpimath.geometry
-import wpimath.interpolation
-import wpimath.kinematics
-import wpimath.optimization
-import wpimath.path
-import wpimath.spline
-import wpimath.system
-import wpimath.system.plant
-import wpimath.trajectory
-import wpimath.trajectory.constraint
-import wpimath.units
-import wpinet
-import wpiutil
-
 # External samples
 sys.path.append("../external_samples")
-import color_range_sensor
-import component
-import rev_touch_sensor
-import servo
-import smart_motor
-import spark_mini
-import sparkfun_led_stick
 
 # Common modules
 sys.path.append("../common")
@@ -74,64 +42,136 @@ import json_util
 FLAGS = flags.FLAGS
 
 flags.DEFINE_string('output_directory', None, 'The directory where output should be written.')
+flags.DEFINE_bool('pretty', False, 'Whether to indent the JSON output so that it is easier to read.')
+flags.DEFINE_bool('compress', False, 'Whether to write gzip-compressed .json.gz files.')
+flags.DEFINE_bool('force', False, 'Whether to regenerate JSON files that are already up to date.')
+flags.mark_flag_as_required('output_directory')
+
+
+# The modules are imported by the worker processes, after the flags have been checked.
+_ROBOTPY_MODULE_NAMES = [
+  'hal',
+  'hal.simulation',
+  'ntcore',
+  'wpilib',
+  'wpilib.counter',
+  'wpilib.drive',
+  'wpilib.event',
+  'wpilib.interfaces',
+  'wpilib.shuffleboard',
+  'wpilib.simulation',
+  'wpilib.sysid',
+  'wpimath',
+  'wpimath.controller',
+  'wpimath.estimator',
+  'wpimath.filter',
+  'wpimath.geometry',
+  'wpimath.interpolation',
+  'wpimath.kinematics',
+  'wpimath.optimization',
+  'wpimath.path',
+  'wpimath.spline',
+  'wpimath.system',
+  'wpimath.system.plant',
+  'wpimath.trajectory',
+  'wpimath.trajectory.constraint',
+  'wpimath.units',
+  'wpinet',
+  'wpiutil',
+]
+
+_EXTERNAL_SAMPLES_MODULE_NAMES = [
+  'color_range_sensor',
+  'component',
+  'rev_touch_sensor',
+  'servo',
+  'smart_motor',
+  'spark_mini',
+  'sparkfun_led_stick',
+]
+
+
+def _getPackageFiles(package: types.ModuleType) -> list[str]:
+  # All the files of a package, including native and pure-Python submodules that haven't been
+  # imported, or the file of a module that isn't a package.
+  package_path = getattr(package, '__path__', None)
+  if not package_path:
+    package_file = getattr(package, '__file__', None)
+    return [package_file] if package_file else []
+  files = []
+  for directory in package_path:
+    for dir_path, dir_names, file_names in os.walk(directory):
+      dir_names[:] = [dir_name for dir_name in dir_names if dir_name != '__pycache__']
+      files.extend(os.path.join(dir_path, file_name) for file_name in file_names)
+  return files
+
+
+def _getCacheKey(module_names: list[str], pretty: bool) -> str:
+  # The JSON depends only on the python version, the installed distributions, the files of the
+  # packages it is generated from, and the code that generates it. None of these require inspecting
+  # the modules.
+  hash = hashlib.sha256()
+  hash.update(f'{sys.version}\n{pretty}\n'.encode('utf-8'))
+  distributions = sorted(
+      (str(distribution.metadata['Name']), distribution.version)
+      for distribution in importlib.metadata.distributions())
+  for (distribution_name, distribution_version) in distributions:
+    hash.update(f'{distribution_name} {distribution_version}\n'.encode('utf-8'))
+  files = {__file__, json_util.__file__, python_util.__file__}
+  for package_name in {module_name.partition('.')[0] for module_name in module_names}:
+    files.update(_getPackageFiles(sys.modules[package_name]))
+  for file in sorted(files):
+    file_stat = os.stat(file)
+    hash.update(f'{file} {file_stat.st_size} {file_stat.st_mtime_ns}\n'.encode('utf-8'))
+  return hash.hexdigest()
+
+
+def _writeJsonFile(
+    module_names: list[str], file_path: pathlib.Path, pretty: bool, compress: bool, force: bool) -> bool:
+  # This runs in a worker process, so it takes module names rather than modules, and it returns
+  # whether file_path was already up to date rather than logging it.
+  # Every worker imports pyfrc and all of the robotpy modules first, as the single process did before,
+  # because python_util.getClass can only resolve classes in modules that have already been imported.
+  imported_module_names = ['pyfrc'] + _ROBOTPY_MODULE_NAMES
+  for module_name in imported_module_names:
+    python_util.getModule(module_name)
+  modules = [python_util.getModule(module_name) for module_name in module_names]
+  cache_key = _getCacheKey(imported_module_names + module_names, pretty)
+  cache_key_path = file_path.with_name(f'{file_path.name}.cache_key')
+  if (not force and file_path.exists() and cache_key_path.exists() and
+      cache_key_path.read_text(encoding='utf-8') == cache_key):
+    return True
+  json_generator = json_util.JsonGenerator(modules)
+  json_generator.writeJsonFile(file_path, pretty, compress)
+  # Like the JSON file, write the cache key to a temporary file and then rename it.
+  tmp_cache_key_path = cache_key_path.with_name(f'{cache_key_path.name}.tmp')
+  tmp_cache_key_path.write_text(cache_key, encoding='utf-8')
+  os.replace(tmp_cache_key_path, cache_key_path)
+  return False
 
 
 def main(argv):
   del argv  # Unused.
 
-  if not FLAGS.output_directory:
-    logging.error(f'You must specify the --output_directory argument')
-    return
-
-  pathlib.Path(f'{FLAGS.output_directory}/generate_json/').mkdir(parents=True, exist_ok=True)
-
-  robotpy_modules = [
-    hal,
-    hal.simulation,
-    ntcore,
-    wpilib,
-    wpilib.counter,
-    wpilib.drive,
-    wpilib.event,
-    wpilib.interfaces,
-    wpilib.shuffleboard,
-    wpilib.simulation,
-    python_util.getModule('wpilib.sysid'),
-    wpimath,
-    wpimath.controller,
-    wpimath.estimator,
-    wpimath.filter,
-    wpimath.geometry,
-    wpimath.interpolation,
-    wpimath.kinematics,
-    wpimath.optimization,
-    wpimath.path,
-    wpimath.spline,
-    wpimath.system,
-    wpimath.system.plant,
-    wpimath.trajectory,
-    wpimath.trajectory.constraint,
-    wpimath.units,
-    wpinet,
-    wpiutil,
-  ]
-  json_generator = json_util.JsonGenerator(robotpy_modules)
-  file_path = f'{FLAGS.output_directory}/generate_json/robotpy_data.json'
-  json_generator.writeJsonFile(file_path)
-
-  external_samples_modules = [
-    color_range_sensor,
-    component,
-    rev_touch_sensor,
-    servo,
-    smart_motor,
-    spark_mini,
-    sparkfun_led_stick,
+  out_dir = pathlib.Path(FLAGS.output_directory) / 'generate_json'
+  out_dir.mkdir(parents=True, exist_ok=True)
+
+  json_extension = '.json.gz' if FLAGS.compress else '.json'
+  module_names_and_file_paths = [
+    (_ROBOTPY_MODULE_NAMES, out_dir / f'robotpy_data{json_extension}'),
+    (_EXTERNAL_SAMPLES_MODULE_NAMES, out_dir / f'external_samples_data{json_extension}'),
   ]
-  json_generator = json_util.JsonGenerator(external_samples_modules)
-  file_path = f'{FLAGS.output_directory}/generate_json/external_samples_data.json'
-  json_generator.writeJsonFile(file_path)
 
+  # The robotpy data and the external samples data are generated independently, so generate them in
+  # parallel.
+  with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+    futures = [
+      executor.submit(_writeJsonFile, module_names, file_path, FLAGS.pretty, FLAGS.compress, FLAGS.force)
+      for (module_names, file_path) in module_names_and_file_paths
+    ]
+    for (module_names, file_path), future in zip(module_names_and_file_paths, futures):
+      if future.result():
+        logging.info(f'{file_path} is up to date')
 
 
 if __name__ == '__main__':
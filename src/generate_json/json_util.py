@@ -15,12 +15,22 @@
 __author__ = "lizlooney@google.com (Liz Looney)"
 
 # Python Standard Library
+from enum import Enum
+import functools
+import gzip
 import inspect
 import json
+import os
 import sys
 import types
 import typing
 
+# orjson is optional; it is faster than json, which is used when orjson is not installed.
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
 # Local modules
 import python_util
 
@@ -53,6 +63,25 @@ _KEY_ARGUMENT_DEFAULT_VALUE = 'defaultValue'
 _KEY_ALIASES = 'aliases'
 _KEY_SUBCLASSES = 'subclasses'
 
+# Each kind of dict is created with all of its keys, in sorted order, so that the JSON encoders don't
+# need to sort them.
+_MODULE_DATA_KEYS = tuple(sorted([
+    _KEY_MODULE_NAME, _KEY_MODULE_VARIABLES, _KEY_FUNCTIONS, _KEY_ENUMS]))
+_CLASS_DATA_KEYS = tuple(sorted([
+    _KEY_CLASS_NAME, _KEY_MODULE_NAME, _KEY_CLASS_VARIABLES, _KEY_INSTANCE_VARIABLES,
+    _KEY_CONSTRUCTORS, _KEY_INSTANCE_METHODS, _KEY_STATIC_METHODS, _KEY_ENUMS]))
+_VARIABLE_DATA_KEYS = tuple(sorted([
+    _KEY_VARIABLE_NAME, _KEY_VARIABLE_TYPE, _KEY_VARIABLE_WRITABLE, _KEY_TOOLTIP]))
+_MODULE_FUNCTION_DATA_KEYS = tuple(sorted([
+    _KEY_FUNCTION_NAME, _KEY_FUNCTION_RETURN_TYPE, _KEY_FUNCTION_ARGS, _KEY_TOOLTIP]))
+_CLASS_FUNCTION_DATA_KEYS = tuple(sorted([
+    _KEY_FUNCTION_NAME, _KEY_FUNCTION_RETURN_TYPE, _KEY_FUNCTION_ARGS,
+    _KEY_FUNCTION_DECLARING_CLASS_NAME, _KEY_TOOLTIP]))
+_ARGUMENT_DATA_KEYS = tuple(sorted([
+    _KEY_ARGUMENT_NAME, _KEY_ARGUMENT_TYPE, _KEY_ARGUMENT_DEFAULT_VALUE]))
+_ENUM_DATA_KEYS = tuple(sorted([
+    _KEY_ENUM_CLASS_NAME, _KEY_MODULE_NAME, _KEY_ENUM_VALUES, _KEY_TOOLTIP]))
+
 
 _DICT_FULL_MODULE_NAME_TO_MODULE_NAME = {
   'hal._wpiHal': 'hal',
@@ -92,7 +121,18 @@ _DICT_FULL_MODULE_NAME_TO_MODULE_NAME = {
   'wpiutil._wpiutil.wpistruct': 'wpiutil.wpistruct',
  }
 
+# The (old prefix, new prefix) pairs used by getClassName, longest full module name first so that a
+# module is never rewritten by the entry for its parent module.
+_MODULE_PREFIX_REPLACEMENTS = tuple(sorted(
+    [(full_module_name + '.', module_name + '.')
+     for full_module_name, module_name in _DICT_FULL_MODULE_NAME_TO_MODULE_NAME.items()],
+    key=lambda replacement: -len(replacement[0])))
+
+# Modules and classes whose module name starts with one of these are left out of the JSON data.
+_EXCLUDED_MODULE_PREFIXES = ('ntcore', 'wpinet', 'wpiutil')
 
+
+@functools.cache
 def getModuleName(m) -> str:
   if inspect.ismodule(m):
     module_name = m.__name__
@@ -103,6 +143,7 @@ def getModuleName(m) -> str:
   return _DICT_FULL_MODULE_NAME_TO_MODULE_NAME.get(module_name, module_name)
 
 
+@functools.cache
 def getClassName(c, containing_class_name: str = None) -> str:
   if inspect.isclass(c):
     full_class_name = python_util.getFullClassName(c)
@@ -113,25 +154,42 @@ def getClassName(c, containing_class_name: str = None) -> str:
       full_class_name = c
   else:
     raise Exception(f'Argument c must be a class or a class name.')
-  for full_module_name, module_name in _DICT_FULL_MODULE_NAME_TO_MODULE_NAME.items():
-    full_class_name = full_class_name.replace(full_module_name + '.', module_name + '.')
+  if '._' not in full_class_name:
+    # Every full module name in _DICT_FULL_MODULE_NAME_TO_MODULE_NAME contains '._'.
+    return full_class_name
+  # A type such as tuple[...] can contain more than one module name, so apply every replacement.
+  for full_module_prefix, module_prefix in _MODULE_PREFIX_REPLACEMENTS:
+    full_class_name = full_class_name.replace(full_module_prefix, module_prefix)
   return full_class_name
 
 
+def _encodeCompactJson(value) -> bytes:
+  if orjson:
+    return orjson.dumps(value)
+  # Without indent, json uses its C encoder. The data is a tree, so there are no cycles to check for,
+  # and like orjson, non-ASCII characters are written as UTF-8 rather than escaped.
+  return json.dumps(
+      value, separators=(',', ':'), check_circular=False, ensure_ascii=False).encode('utf-8')
+
+
 class JsonGenerator:
   def __init__(self, root_modules: list[types.ModuleType]):
     self._root_modules = root_modules
     (self._packages, self._modules, self._classes, self._dict_full_class_name_to_alias) = python_util.collectModulesAndClasses(self._root_modules)
     self._dict_full_class_name_to_subclass_names = python_util.collectSubclasses(self._classes)
+    self._dict_enum_cls_to_enum_data = {}
+    # Error messages are collected here and written to stderr together when _getJsonData is done.
+    self._errors = []
 
   def _getPublicModules(self) -> list[types.ModuleType]:
-    public_modules = []
+    names_and_public_modules = []
     for m in self._modules:
-      if '._' in python_util.getFullModuleName(m):
+      full_module_name = python_util.getFullModuleName(m)
+      if '._' in full_module_name:
         continue
-      public_modules.append(m)
-    public_modules.sort(key=lambda m: python_util.getFullModuleName(m))
-    return public_modules
+      names_and_public_modules.append((full_module_name, m))
+    names_and_public_modules.sort(key=lambda name_and_module: name_and_module[0])
+    return [m for (full_module_name, m) in names_and_public_modules]
 
 
   def _createFunctionIsEnumValue(
@@ -139,17 +197,49 @@ class JsonGenerator:
     return lambda value: type(value) == enum_cls
 
 
+  def _getEnumValueNames(self, enum_cls: type) -> list[str]:
+    if issubclass(enum_cls, Enum):
+      # Unlike __members__, _member_names_ leaves out aliases and multi-bit Flag composites, which
+      # aren't enum values of their own.
+      return sorted(enum_cls._member_names_)
+    if hasattr(enum_cls, '__members__'):
+      # pybind11 enums have __members__, mapping each value name to its value.
+      return sorted(enum_cls.__members__)
+    fnIsEnumValue = self._createFunctionIsEnumValue(enum_cls)
+    return sorted([key for key, value in python_util.getMembers(enum_cls, fnIsEnumValue)])
+
+
+  def _processEnum(self, enum_cls: type) -> dict:
+    # The same enum is reached through its module, its containing class, and every subclass of the
+    # containing class, so its data is computed once.
+    enum_data = self._dict_enum_cls_to_enum_data.get(enum_cls)
+    if enum_data is not None:
+      return enum_data
+    enum_values = self._getEnumValueNames(enum_cls)
+    enum_tooltip = enum_cls.__doc__ if enum_values else ''
+    enum_data = dict.fromkeys(_ENUM_DATA_KEYS)
+    enum_data[_KEY_ENUM_CLASS_NAME] = getClassName(enum_cls)
+    enum_data[_KEY_MODULE_NAME] = getModuleName(enum_cls.__module__)
+    enum_data[_KEY_ENUM_VALUES] = enum_values
+    if enum_tooltip is not None:
+      enum_data[_KEY_TOOLTIP] = enum_tooltip
+    else:
+      enum_data[_KEY_TOOLTIP] = ''
+    self._dict_enum_cls_to_enum_data[enum_cls] = enum_data
+    return enum_data
+
+
   def _processModule(self, module) -> dict:
-    module_data = {}
+    module_data = dict.fromkeys(_MODULE_DATA_KEYS)
     module_name = getModuleName(module)
     module_data[_KEY_MODULE_NAME] = module_name
 
     # Module variables.
     module_variables = []
-    for key, value in inspect.getmembers(module, python_util.isNothing):
+    for key, value in python_util.getMembers(module, python_util.isNothing):
       if not python_util.isModuleVariableReadable(module, key, value):
         continue
-      var_data = {}
+      var_data = dict.fromkeys(_VARIABLE_DATA_KEYS)
       var_data[_KEY_VARIABLE_NAME] = key
       var_data[_KEY_VARIABLE_TYPE] = getClassName(type(value))
       var_data[_KEY_VARIABLE_WRITABLE] = python_util.isModuleVariableWritable(module, key, value)
@@ -159,7 +249,7 @@ class JsonGenerator:
 
     # Module functions.
     functions = []
-    for key, value in inspect.getmembers(module, inspect.isroutine):
+    for key, value in python_util.getMembers(module, inspect.isroutine):
       if not python_util.isFunction(module, key, value):
         continue
       # Check whether value is a function imported from another module.
@@ -177,38 +267,34 @@ class JsonGenerator:
       # Look at each function signature. For overloaded functions, there will be more than one.
       (signatures, comments) = python_util.processFunction(value)
       if len(signatures) == 0:
-        print(f'ERROR: failed to determine function signature for {module_name}.{key}',
-              file=sys.stderr)
+        self._errors.append(f'ERROR: failed to determine function signature for {module_name}.{key}')
         continue
-      for iSignature in range(len(signatures)):
-        signature = signatures[iSignature]
+      for signature, comment in zip(signatures, comments):
         # Determine the argument names and types.
         try:
           (function_name, arg_names, arg_types, arg_default_values, return_type) = python_util.processSignature(signature)
         except:
-          print(f'ERROR: function signature for {module_name}.{key} is not parseable. "{signature}"',
-                file=sys.stderr)
+          self._errors.append(f'ERROR: function signature for {module_name}.{key} is not parseable. "{signature}"')
           continue
         if function_name != key:
-          print(f'ERROR: signature has different function name. {module_name}.{key}',
-                file=sys.stderr)
+          self._errors.append(f'ERROR: signature has different function name. {module_name}.{key}')
           continue
         args = []
-        for i in range(len(arg_names)):
-          arg_data = {}
-          arg_data[_KEY_ARGUMENT_NAME] = arg_names[i]
-          arg_data[_KEY_ARGUMENT_TYPE] = getClassName(arg_types[i])
-          if arg_default_values[i] is not None:
-            arg_data[_KEY_ARGUMENT_DEFAULT_VALUE] = arg_default_values[i]
+        for arg_name, arg_type, arg_default_value in zip(arg_names, arg_types, arg_default_values):
+          arg_data = dict.fromkeys(_ARGUMENT_DATA_KEYS)
+          arg_data[_KEY_ARGUMENT_NAME] = arg_name
+          arg_data[_KEY_ARGUMENT_TYPE] = getClassName(arg_type)
+          if arg_default_value is not None:
+            arg_data[_KEY_ARGUMENT_DEFAULT_VALUE] = arg_default_value
           else:
             arg_data[_KEY_ARGUMENT_DEFAULT_VALUE] = ''
           args.append(arg_data)
-        function_data = {}
+        function_data = dict.fromkeys(_MODULE_FUNCTION_DATA_KEYS)
         function_data[_KEY_FUNCTION_NAME] = function_name
         function_data[_KEY_FUNCTION_RETURN_TYPE] = getClassName(return_type)
         function_data[_KEY_FUNCTION_ARGS] = args
-        if comments[iSignature] is not None:
-          function_data[_KEY_TOOLTIP] = comments[iSignature]
+        if comment is not None:
+          function_data[_KEY_TOOLTIP] = comment
         else:
           function_data[_KEY_TOOLTIP] = ''
         functions.append(function_data)
@@ -216,27 +302,10 @@ class JsonGenerator:
 
     # Enums
     enums = []
-    for key, value in inspect.getmembers(module, python_util.isEnum):
-      enum_class_name = getClassName(value)
+    for key, value in python_util.getMembers(module, python_util.isEnum):
       if getModuleName(value.__module__) != module_name:
         continue
-      fnIsEnumValue = self._createFunctionIsEnumValue(value)
-      enum_values = []
-      enum_tooltip = ''
-      for keyEnum, valueEnum in inspect.getmembers(value, fnIsEnumValue):
-        enum_values.append(keyEnum)
-        if not enum_tooltip:
-          enum_tooltip = value.__doc__
-      enum_values.sort()
-      enum_data = {}
-      enum_data[_KEY_ENUM_CLASS_NAME] = enum_class_name
-      enum_data[_KEY_MODULE_NAME] = getModuleName(value.__module__)
-      enum_data[_KEY_ENUM_VALUES] = enum_values
-      if enum_tooltip is not None:
-        enum_data[_KEY_TOOLTIP] = enum_tooltip
-      else:
-        enum_data[_KEY_TOOLTIP] = ''
-      enums.append(enum_data)
+      enums.append(self._processEnum(value))
     module_data[_KEY_ENUMS] = sorted(enums, key=lambda enum_data: enum_data[_KEY_ENUM_CLASS_NAME])
     return module_data
 
@@ -248,11 +317,7 @@ class JsonGenerator:
       set_of_modules.add(module)
     for module in set_of_modules:
       module_name = getModuleName(module)
-      if module_name.startswith('ntcore'):
-        continue
-      if module_name.startswith('wpinet'):
-        continue
-      if module_name.startswith('wpiutil'):
+      if module_name.startswith(_EXCLUDED_MODULE_PREFIXES):
         continue
       #if not hasattr(module, '__all__'):
       #  print(f'Skipping module {getModuleName(module)}')
@@ -269,12 +334,12 @@ class JsonGenerator:
       if '._' in class_name:
         continue
       public_classes.append(c)
-    public_classes.sort(key=lambda c: python_util.getFullClassName(c))
+    # self._classes is already sorted by full class name, so public_classes is too.
     return public_classes
 
 
   def _processClass(self, cls):
-    class_data = {}
+    class_data = dict.fromkeys(_CLASS_DATA_KEYS)
     class_name = getClassName(cls)
     full_class_name = python_util.getFullClassName(cls)
     class_data[_KEY_CLASS_NAME] = class_name
@@ -282,10 +347,10 @@ class JsonGenerator:
 
     # Class variables.
     class_variables = []
-    for key, value in inspect.getmembers(cls, python_util.isNothing):
+    for key, value in python_util.getMembers(cls, python_util.isNothing):
       if not python_util.isClassVariableReadable(cls, key, value):
         continue
-      var_data = {}
+      var_data = dict.fromkeys(_VARIABLE_DATA_KEYS)
       var_data[_KEY_VARIABLE_NAME] = key
       var_data[_KEY_VARIABLE_TYPE] = getClassName(type(value), class_name)
       var_data[_KEY_VARIABLE_WRITABLE] = python_util.isClassVariableWritable(cls, key, value)
@@ -295,11 +360,11 @@ class JsonGenerator:
 
     # Instance variables
     instance_variables = []
-    for key, value in inspect.getmembers(cls, inspect.isdatadescriptor):
+    for key, value in python_util.getMembers(cls, inspect.isdatadescriptor):
       if not python_util.isInstanceVariableReadable(cls, key, value):
         continue
       var_type = python_util.getVarTypeFromGetter(value.fget)
-      var_data = {}
+      var_data = dict.fromkeys(_VARIABLE_DATA_KEYS)
       var_data[_KEY_VARIABLE_NAME] = key
       var_data[_KEY_VARIABLE_TYPE] = getClassName(var_type, class_name)
       var_data[_KEY_VARIABLE_WRITABLE] = python_util.isInstanceVariableWritable(cls, key, value)
@@ -312,49 +377,43 @@ class JsonGenerator:
 
     # Constructors
     constructors = []
-    for key, value in inspect.getmembers(cls):#, python_util.mightBeConstructor):
+    for key, value in python_util.getMembers(cls):#, python_util.mightBeConstructor):
       if not python_util.isConstructor(cls, key, value):
         continue
       # Look at each function signature. For overloaded functions, there will be more than one.
       (signatures, comments) = python_util.processFunction(value, cls)
       if len(signatures) == 0:
-        print(f'ERROR: failed to determine function signature for {class_name}.{key}',
-              file=sys.stderr)
+        self._errors.append(f'ERROR: failed to determine function signature for {class_name}.{key}')
         continue
-      for iSignature in range(len(signatures)):
-        signature = signatures[iSignature]
+      for signature, comment in zip(signatures, comments):
         # Determine the argument names and types.
         try:
           (function_name, arg_names, arg_types, arg_default_values, return_type) = python_util.processSignature(signature)
         except:
-          print(f'ERROR: function signature for {class_name}.{key} is not parseable. "{signature}"',
-                file=sys.stderr)
+          self._errors.append(f'ERROR: function signature for {class_name}.{key} is not parseable. "{signature}"')
           continue
         if function_name != key:
-          print(f'ERROR: signature has different function name. {class_name}.{key}',
-                file=sys.stderr)
+          self._errors.append(f'ERROR: signature has different function name. {class_name}.{key}')
           continue
         declaring_class_name = class_name
-        constructor_data = {}
+        constructor_data = dict.fromkeys(_CLASS_FUNCTION_DATA_KEYS)
         constructor_data[_KEY_FUNCTION_NAME] = function_name
-        if comments[iSignature] is not None:
-          constructor_data[_KEY_TOOLTIP] = comments[iSignature]
+        if comment is not None:
+          constructor_data[_KEY_TOOLTIP] = comment
         else:
           constructor_data[_KEY_TOOLTIP] = ''
         args = []
-        for i in range(len(arg_names)):
-          arg_name = arg_names[i]
-          arg_type = arg_types[i]
+        for i, (arg_name, arg_type, arg_default_value) in enumerate(zip(arg_names, arg_types, arg_default_values)):
           if i == 0 and arg_name == 'self':
             if arg_type != full_class_name:
               declaring_class_name = getClassName(arg_type, class_name)
             # Don't append the self argument to the args array.
             continue;
-          arg_data = {}
+          arg_data = dict.fromkeys(_ARGUMENT_DATA_KEYS)
           arg_data[_KEY_ARGUMENT_NAME] = arg_name
           arg_data[_KEY_ARGUMENT_TYPE] = getClassName(arg_type, class_name)
-          if arg_default_values[i] is not None:
-            arg_data[_KEY_ARGUMENT_DEFAULT_VALUE] = arg_default_values[i]
+          if arg_default_value is not None:
+            arg_data[_KEY_ARGUMENT_DEFAULT_VALUE] = arg_default_value
           else:
             arg_data[_KEY_ARGUMENT_DEFAULT_VALUE] = ''
           args.append(arg_data)
@@ -367,53 +426,47 @@ class JsonGenerator:
     # Functions
     instance_methods = []
     static_methods = []
-    for key, value in inspect.getmembers(cls, inspect.isroutine):
+    for key, value in python_util.getMembers(cls, inspect.isroutine):
       if not python_util.isFunction(cls, key, value):
         continue
       # Look at each function signature. For overloaded functions, there will be more than one.
       (signatures, comments) = python_util.processFunction(value, cls)
       if len(signatures) == 0:
-        print(f'ERROR: failed to determine function signature for {class_name}.{key}',
-              file=sys.stderr)
+        self._errors.append(f'ERROR: failed to determine function signature for {class_name}.{key}')
         continue
-      for iSignature in range(len(signatures)):
-        signature = signatures[iSignature]
+      for signature, comment in zip(signatures, comments):
         # Determine the argument names and types.
         try:
           (function_name, arg_names, arg_types, arg_default_values, return_type) = python_util.processSignature(signature)
         except:
-          print(f'ERROR: function signature for {class_name}.{key} is not parseable. "{signature}"',
-                file=sys.stderr)
+          self._errors.append(f'ERROR: function signature for {class_name}.{key} is not parseable. "{signature}"')
           continue
         if function_name != key:
-          print(f'ERROR: signature has different function name. {class_name}.{key}',
-                file=sys.stderr)
+          self._errors.append(f'ERROR: signature has different function name. {class_name}.{key}')
           continue
         declaring_class_name = class_name
         args = []
         found_self_arg = False
-        for i in range(len(arg_names)):
-          arg_name = arg_names[i]
-          arg_type = arg_types[i]
+        for i, (arg_name, arg_type, arg_default_value) in enumerate(zip(arg_names, arg_types, arg_default_values)):
           if i == 0 and arg_name == 'self':
             found_self_arg = True
             if arg_type != full_class_name:
               declaring_class_name = getClassName(arg_type, class_name)
-          arg_data = {}
+          arg_data = dict.fromkeys(_ARGUMENT_DATA_KEYS)
           arg_data[_KEY_ARGUMENT_NAME] = arg_name
           arg_data[_KEY_ARGUMENT_TYPE] = getClassName(arg_type, class_name)
-          if arg_default_values[i] is not None:
-            arg_data[_KEY_ARGUMENT_DEFAULT_VALUE] = arg_default_values[i]
+          if arg_default_value is not None:
+            arg_data[_KEY_ARGUMENT_DEFAULT_VALUE] = arg_default_value
           else:
             arg_data[_KEY_ARGUMENT_DEFAULT_VALUE] = ''
           args.append(arg_data)
-        function_data = {}
+        function_data = dict.fromkeys(_CLASS_FUNCTION_DATA_KEYS)
         function_data[_KEY_FUNCTION_NAME] = function_name
         function_data[_KEY_FUNCTION_RETURN_TYPE] = getClassName(return_type, class_name)
         function_data[_KEY_FUNCTION_ARGS] = args
         function_data[_KEY_FUNCTION_DECLARING_CLASS_NAME] = declaring_class_name
-        if comments[iSignature] is not None:
-          function_data[_KEY_TOOLTIP] = comments[iSignature]
+        if comment is not None:
+          function_data[_KEY_TOOLTIP] = comment
         else:
           function_data[_KEY_TOOLTIP] = ''
         if found_self_arg:
@@ -425,27 +478,10 @@ class JsonGenerator:
 
     # Enums
     enums = []
-    for key, value in inspect.getmembers(cls, python_util.isEnum):
+    for key, value in python_util.getMembers(cls, python_util.isEnum):
       if not getClassName(value).startswith(class_name):
         continue
-      enum_class_name = getClassName(value)
-      fnIsEnumValue = self._createFunctionIsEnumValue(value)
-      enum_values = []
-      enum_tooltip = ''
-      for keyEnum, valueEnum in inspect.getmembers(value, fnIsEnumValue):
-        enum_values.append(keyEnum)
-        if not enum_tooltip:
-          enum_tooltip = value.__doc__
-      enum_values.sort()
-      enum_data = {}
-      enum_data[_KEY_ENUM_CLASS_NAME] = enum_class_name
-      enum_data[_KEY_MODULE_NAME] = getModuleName(value.__module__)
-      enum_data[_KEY_ENUM_VALUES] = enum_values
-      if enum_tooltip is not None:
-        enum_data[_KEY_TOOLTIP] = enum_tooltip
-      else:
-        enum_data[_KEY_TOOLTIP] = ''
-      enums.append(enum_data)
+      enums.append(self._processEnum(value))
     class_data[_KEY_ENUMS] = sorted(enums, key=lambda enum_data: enum_data[_KEY_ENUM_CLASS_NAME])
     return class_data
 
@@ -454,19 +490,12 @@ class JsonGenerator:
     class_data_list = []
     set_of_classes = set()
     for cls in self._getPublicClasses():
-      for c in inspect.getmro(cls):
-        if python_util.isBuiltInClass(c):
-          break
-        set_of_classes.add(c)
+      set_of_classes.update(python_util.getNonBuiltInMro(cls))
     for cls in set_of_classes:
       if python_util.isEnum(cls):
         continue
       module_name = getModuleName(cls.__module__)
-      if module_name.startswith('ntcore'):
-        continue
-      if module_name.startswith('wpinet'):
-        continue
-      if module_name.startswith('wpiutil'):
+      if module_name.startswith(_EXCLUDED_MODULE_PREFIXES):
         continue
       #module = python_util.getModule(module_name)
       #if not hasattr(module, '__all__'):
@@ -484,7 +513,7 @@ class JsonGenerator:
     aliases = {}
     for full_class_name, alias in self._dict_full_class_name_to_alias.items():
       aliases[getClassName(full_class_name)] = getClassName(alias)
-    return aliases
+    return dict(sorted(aliases.items()))
 
 
   def _processSubclasses(self):
@@ -494,18 +523,61 @@ class JsonGenerator:
       for full_subclass_name in full_subclass_names:
         list.append(getClassName(full_subclass_name))
       subclasses[getClassName(full_class_name)] = list
-    return subclasses
+    return dict(sorted(subclasses.items()))
+
+  def _writeErrors(self):
+    if self._errors:
+      sys.stderr.write('\n'.join(self._errors) + '\n')
+      self._errors.clear()
+
+  def _iterJsonData(self):
+    # Yields the top-level (key, value) pairs of the JSON data in sorted key order, computing each
+    # value only when it is needed.
+    processors = {
+      _KEY_MODULES: self._processModules,
+      _KEY_CLASSES: self._processClasses,
+      _KEY_ALIASES: self._processAliases,
+      _KEY_SUBCLASSES: self._processSubclasses,
+    }
+    try:
+      for key in sorted(processors):
+        yield (key, processors[key]())
+    finally:
+      self._writeErrors()
 
   def _getJsonData(self):
-    json_data = {}
-    json_data[_KEY_MODULES] = self._processModules()
-    json_data[_KEY_CLASSES] = self._processClasses()
-    json_data[_KEY_ALIASES] = self._processAliases()
-    json_data[_KEY_SUBCLASSES] = self._processSubclasses()
-    return json_data
-
-  def writeJsonFile(self, file_path: str):
-    json_data = self._getJsonData()
-    json_file = open(file_path, 'w', encoding='utf-8')
-    json.dump(json_data, json_file, sort_keys=True, indent=4)
-    json_file.close()
+    return dict(self._iterJsonData())
+
+  def _writeJson(self, json_file: typing.BinaryIO, pretty: bool):
+    # The JSON is encoded to UTF-8 bytes in large pieces and written to a binary file, rather than
+    # letting json.dump issue a write for every token through a text file.
+    if pretty:
+      json_text = json.dumps(
+          self._getJsonData(), indent=4, check_circular=False, ensure_ascii=False)
+      json_file.write(json_text.encode('utf-8'))
+      return
+    # Encode and write one top-level value at a time, so that only one of them is held in memory.
+    separator = b'{'
+    for key, value in self._iterJsonData():
+      json_file.write(b''.join([separator, _encodeCompactJson(key), b':', _encodeCompactJson(value)]))
+      # Release this value before the next one is computed.
+      del value
+      separator = b','
+    json_file.write(b'}')
+
+  def writeJsonFile(self, file_path: str | os.PathLike, pretty: bool = False, compress: bool = False):
+    # Write to a temporary file in the same directory and then rename it, so that file_path never
+    # holds a partially written file.
+    tmp_file_path = f'{os.fspath(file_path)}.tmp'
+    try:
+      with open(tmp_file_path, 'wb') as file:
+        if compress:
+          # Leave the file name and time out of the gzip header so that the output is reproducible.
+          with gzip.GzipFile(filename='', mode='wb', compresslevel=1, fileobj=file, mtime=0) as json_file:
+            self._writeJson(json_file, pretty)
+        else:
+          self._writeJson(file, pretty)
+      os.replace(tmp_file_path, file_path)
+    finally:
+      if os.path.exists(tmp_file_path):
+        os.remove(tmp_file_path)